@@ -0,0 +1,63 @@
+# Page extraction entry points for the worker processes. Kept apart from the web app
+# so the spawned workers import MuPDF alone rather than FastAPI, numba and Tesseract.
+import fitz  # PyMuPDF
+import os
+
+# Scanned pages are rendered at 2x (~144 DPI) in grayscale, which is plenty for
+# Tesseract and a third of the bytes of an RGB render
+OCR_ZOOM = 2
+
+def open_pdf(source):
+    """Open a PDF from a file path or from its raw bytes."""
+    if isinstance(source, bytes):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+def count_pages(pdf_source):
+    """Return the number of pages of a PDF."""
+    with open_pdf(pdf_source) as doc:
+        return len(doc)
+
+def extract_pages(pdf_source, page_nums, spill_dir):
+    """Extract the text blocks of the given pages, rendering pages without a text layer for OCR.
+
+    Runs in a worker process on its own copy of the document. Returns the
+    (text, bbox, page) tuple of every text block and a (page number, image path, page
+    width, page height, image width, image height) tuple for every page left for OCR.
+    The pages are written to spill_dir, so a run of pages never holds (or pickles back
+    to the parent) all of its rasters at once.
+    """
+    paragraphs = []
+    ocr_pages = []
+
+    doc = open_pdf(pdf_source)
+    
+    for page_num in page_nums:
+        page = doc.load_page(page_num)
+        page_width = page.rect.width
+        page_height = page.rect.height
+
+        # Try text extraction first, MuPDF already groups the words into paragraph blocks
+        text_blocks = [
+            block for block in page.get_text("blocks", sort=True)
+            if block[6] == 0 and block[4].strip()  # Text blocks only, skip images
+        ]
+        
+        if text_blocks:
+            for block in text_blocks:
+                paragraphs.append((
+                    ' '.join(block[4].split()),  # Join the block's lines into one string
+                    list(block[:4]),  # Bounding box (convert tuple to list)
+                    page_num
+                ))
+        else:
+            # Fallback to OCR, deferred so the scanned pages can be recognized in parallel.
+            # PNM is the raw samples behind a short header, so this is just a copy to disk.
+            pix = page.get_pixmap(matrix=fitz.Matrix(OCR_ZOOM, OCR_ZOOM), colorspace=fitz.csGRAY, alpha=False)
+            image = os.path.join(spill_dir, f"p{page_num}.pnm")
+            pix.save(image)
+            ocr_pages.append((page_num, image, page_width, page_height, pix.width, pix.height))
+
+    doc.close()
+
+    return paragraphs, ocr_pages
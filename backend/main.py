@@ -1,18 +1,76 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import fitz  # PyMuPDF
-import requests
+import numpy as np
+import numba
+import httpx
 import tempfile
+import shutil
 import os
-import pytesseract
-from PIL import Image
-import io
+# Run several single-threaded Tesseract instances side by side instead of one
+# using OpenMP, which scales better across the pages of a document. OpenMP reads
+# this when Tesseract is loaded, so it has to be set before the import.
+os.environ["OMP_THREAD_LIMIT"] = "1"
+from tesserocr import PyTessBaseAPI, PSM, OEM, RIL, iterate_level
+import threading
+import asyncio
+import hashlib
+from cachetools import TTLCache
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
 from fastapi.middleware.cors import CORSMiddleware
 from uuid import uuid4
-from typing import List, Dict, Any
-import statistics
+import itertools
+import collections
+import orjson
+from extraction import count_pages, extract_pages
+from contextlib import asynccontextmanager
 
-app = FastAPI()
+# Size of the chunks read from the network while downloading a PDF to disk. Chunks this
+# large go past the file's write buffer straight to the OS.
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# Extraction results are cached per URL, as their serialized NDJSON lines, and revalidated
+# against the origin's ETag/Last-Modified. The cache is bounded by the total size of those
+# lines (least recently used entries go first) and oversized results are not cached at all.
+CACHE_TTL = 3600
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+CACHE_MAX_RESULT_BYTES = 16 * 1024 * 1024
+pdf_cache = TTLCache(maxsize=CACHE_MAX_BYTES, ttl=CACHE_TTL, getsizeof=lambda entry: entry['size'])
+
+# Scanned pages are OCRed on a pool of threads, each keeping its own Tesseract
+# instance (and loaded language data) alive across pages and requests
+OCR_WORKERS = os.cpu_count() or 1
+ocr_executor = ThreadPoolExecutor(max_workers=OCR_WORKERS)
+tesseract_local = threading.local()
+
+# PDFs up to this size (by Content-Length) are kept in memory and handed to the page
+# worker processes as bytes, larger or unsized ones are streamed to a temp file
+IN_MEMORY_PDF_LIMIT = 16 * 1024 * 1024
+
+# Pages are extracted in worker processes, each of which opens its own copy of the
+# document (MuPDF is not fork-safe, hence spawn, and does not support being driven
+# from several threads at once, hence processes). The workers only import the
+# extraction module, not this one. Parsing and rendering is CPU bound,
+# so there is one process per core.
+PAGE_WORKERS = os.cpu_count() or 1
+
+def new_page_executor():
+    return ProcessPoolExecutor(max_workers=PAGE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+page_executor = new_page_executor()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Compile the grouping kernels up front so the first OCR request does not pay for it,
+    and stop the page worker processes on shutdown."""
+    for _ in group_text_blocks(['warm', 'up'], np.array([[0.0, 0.0, 10.0, 10.0], [12.0, 0.0, 20.0, 10.0]]), np.zeros(2, dtype=np.int64)):
+        pass
+    yield
+    page_executor.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -31,34 +89,88 @@ class ExtractionResult(BaseModel):
     bbox: list[float]
     page: int
 
-def convert_image_to_pdf_coords(image_x, image_y, image_w, image_h, page_width, page_height):
-    """Convert image coordinates to web coordinate system (top-left origin)"""
-    return [
-        image_x * (page_width / image_w),
-        image_y * (page_height / image_h),
-        (image_x + image_w) * (page_width / image_w),
-        (image_y + image_h) * (page_height / image_h)
-    ]
+def convert_image_to_pdf_coords(image_x, image_y, image_w, image_h, scale_x, scale_y):
+    """Convert image coordinates to web coordinate system (top-left origin).
 
-def calculate_text_heights(text_blocks):
+    The scale factors (page size / image size) are computed once per page by the caller.
+    All arguments may be NumPy arrays, so a whole OCR batch is converted at once.
+    """
+    return np.column_stack((
+        image_x * scale_x,
+        image_y * scale_y,
+        (image_x + image_w) * scale_x,
+        (image_y + image_h) * scale_y
+    ))
+
+def calculate_text_heights(bboxes):
     """Calculate the heights of text blocks to determine appropriate thresholds"""
-    heights = []
-    for block in text_blocks:
-        height = block['bbox'][3] - block['bbox'][1]
-        if height > 0:  # Ensure valid height
-            heights.append(height)
+    heights = bboxes[:, 3] - bboxes[:, 1]
+    heights = heights[heights > 0]  # Ensure valid height
     
-    if not heights:
+    if not heights.size:
         return 1.0  # Default if no valid heights
     
-    # Use median to avoid outliers affecting the result
-    median_height = statistics.median(heights)
+    # Use median to avoid outliers affecting the result (np.median selects rather than fully sorting)
+    median_height = float(np.median(heights))
     return median_height
 
-def group_text_blocks(text_blocks):
-    """Group text blocks into logical lines based on spatial proximity and reading order."""
+@numba.njit(cache=True)
+def merge_lines(line_starts, bboxes, horizontal_tolerance):
+    """Merge sorted blocks that sit on the same line and are close enough horizontally.
+
+    Returns the line index of every block and the bbox of every line.
+    """
+    line_ids = np.empty(bboxes.shape[0], dtype=np.int64)
+    line_bboxes = np.empty_like(bboxes)
+    line = -1
+    for i in range(bboxes.shape[0]):
+        if line < 0 or line_starts[i] or bboxes[i, 0] > line_bboxes[line, 2] + horizontal_tolerance:
+            # Start a new line
+            line += 1
+            line_bboxes[line] = bboxes[i]
+        else:
+            # Merge with previous block
+            line_bboxes[line, 1] = min(line_bboxes[line, 1], bboxes[i, 1])
+            line_bboxes[line, 2] = max(line_bboxes[line, 2], bboxes[i, 2])
+            line_bboxes[line, 3] = max(line_bboxes[line, 3], bboxes[i, 3])
+        line_ids[i] = line
+    return line_ids, line_bboxes[:line + 1]
+
+@numba.njit(cache=True)
+def merge_paragraphs(line_pages, line_bboxes, vertical_gap_threshold):
+    """Merge consecutive lines on the same page whose vertical gap is small enough.
+
+    Returns the paragraph index of every line and the bbox of every paragraph.
+    """
+    paragraph_ids = np.empty(line_bboxes.shape[0], dtype=np.int64)
+    paragraph_bboxes = np.empty_like(line_bboxes)
+    paragraph = -1
+    for i in range(line_bboxes.shape[0]):
+        # Vertical gap between last line's bottom and current line's top
+        if (paragraph < 0 or
+                line_pages[i] != line_pages[i - 1] or
+                line_bboxes[i, 1] - line_bboxes[i - 1, 3] > vertical_gap_threshold):
+            paragraph += 1
+            paragraph_bboxes[paragraph] = line_bboxes[i]
+        else:
+            paragraph_bboxes[paragraph, 0] = min(paragraph_bboxes[paragraph, 0], line_bboxes[i, 0])
+            paragraph_bboxes[paragraph, 1] = min(paragraph_bboxes[paragraph, 1], line_bboxes[i, 1])
+            paragraph_bboxes[paragraph, 2] = max(paragraph_bboxes[paragraph, 2], line_bboxes[i, 2])
+            paragraph_bboxes[paragraph, 3] = max(paragraph_bboxes[paragraph, 3], line_bboxes[i, 3])
+        paragraph_ids[i] = paragraph
+    return paragraph_ids, paragraph_bboxes[:paragraph + 1]
+
+def group_text_blocks(texts, bboxes, pages):
+    """Group text blocks into lines and lines into paragraphs based on spatial proximity and reading order.
+
+    The blocks come in as parallel arrays: their texts, an (N, 4) array of bboxes and
+    an array of page numbers. Yields a (text, bbox, page) tuple per paragraph.
+    """
+    if not texts:
+        return
+
     # Calculate median text height to use for adaptive thresholds
-    median_height = calculate_text_heights(text_blocks)
+    median_height = calculate_text_heights(bboxes)
     
     # Set horizontal tolerance based on text height
     horizontal_tolerance = median_height * 0.3
@@ -66,220 +178,294 @@ def group_text_blocks(text_blocks):
     # Set vertical tolerance for same line
     vertical_tolerance = median_height * 0.25
     
-    # Group blocks that are on the same approximate horizontal line first
-    line_groups = []
-    current_line = []
-    
-    # Sort blocks first by page, then by y-coordinate (with tolerance for slight misalignments)
-    y_sorted_blocks = sorted(text_blocks, key=lambda x: (x['page'], int(x['bbox'][1] / vertical_tolerance)))
-    
-    current_y_group = None
-    for block in y_sorted_blocks:
-        y_group = int(block['bbox'][1] / vertical_tolerance)
-        
-        if current_y_group is None:
-            current_y_group = y_group
-            current_line.append(block)
-        elif block['page'] == current_line[-1]['page'] and y_group == current_y_group:
-            current_line.append(block)
-        else:
-            # Sort blocks within the line by x-coordinate
-            current_line.sort(key=lambda x: x['bbox'][0])
-            line_groups.append(current_line)
-            current_line = [block]
-            current_y_group = y_group
-    
-    if current_line:
-        current_line.sort(key=lambda x: x['bbox'][0])
-        line_groups.append(current_line)
-    
-    # Now merge blocks within each line
-    final_groups = []
-    for line in line_groups:
-        merged_line = []
-        current_group = []
-        
-        for block in line:
-            if not current_group:
-                current_group.append(block)
-            else:
-                last_block = current_group[-1]
-                
-                # Check if blocks should be merged (close enough horizontally)
-                if block['bbox'][0] <= last_block['bbox'][2] + horizontal_tolerance:
-                    # Merge with previous block
-                    last_block['text'] += ' ' + block['text']
-                    last_block['bbox'][2] = max(last_block['bbox'][2], block['bbox'][2])
-                    last_block['bbox'][3] = max(last_block['bbox'][3], block['bbox'][3])
-                else:
-                    # Start a new group
-                    merged_line.append({
-                        'id': current_group[0]['id'],
-                        'text': ' '.join(b['text'] for b in current_group),
-                        'bbox': [
-                            min(b['bbox'][0] for b in current_group),
-                            min(b['bbox'][1] for b in current_group),
-                            max(b['bbox'][2] for b in current_group),
-                            max(b['bbox'][3] for b in current_group)
-                        ],
-                        'page': current_group[0]['page']
-                    })
-                    current_group = [block]
-        
-        if current_group:
-            merged_line.append({
-                'id': current_group[0]['id'],
-                'text': ' '.join(b['text'] for b in current_group),
-                'bbox': [
-                    min(b['bbox'][0] for b in current_group),
-                    min(b['bbox'][1] for b in current_group),
-                    max(b['bbox'][2] for b in current_group),
-                    max(b['bbox'][3] for b in current_group)
-                ],
-                'page': current_group[0]['page']
-            })
-        
-        final_groups.extend(merged_line)
+    y_groups = (bboxes[:, 1] / vertical_tolerance).astype(np.int64)
     
-    return final_groups
-
-def group_paragraphs(lines: List[Dict[str, Any]]):
-    """Group lines into paragraphs based on vertical proximity and text size."""
-    if not lines:
-        return []
+    # Sort blocks by page, then by y-coordinate (with tolerance for slight misalignments), then by x-coordinate
+    order = np.lexsort((bboxes[:, 0], y_groups, pages))
+    pages = pages[order]
+    y_groups = y_groups[order]
+    bboxes = np.ascontiguousarray(bboxes[order], dtype=np.float64)
     
-    # Calculate line heights to determine appropriate paragraph spacing threshold
-    line_heights = [line['bbox'][3] - line['bbox'][1] for line in lines]
-    if not line_heights:
-        return []
+    # A new line starts wherever the page or the y group changes
+    line_starts = np.ones(len(order), dtype=np.bool_)
+    line_starts[1:] = (pages[1:] != pages[:-1]) | (y_groups[1:] != y_groups[:-1])
     
-    median_line_height = statistics.median(line_heights)
+    line_ids, line_bboxes = merge_lines(line_starts, bboxes, horizontal_tolerance)
+    line_pages = pages[np.flatnonzero(np.diff(line_ids, prepend=-1))]
     
     # Use 1.5 times the median line height as the paragraph spacing threshold
+    median_line_height = float(np.median(line_bboxes[:, 3] - line_bboxes[:, 1]))
     vertical_gap_threshold = median_line_height * 1.5
     
-    paragraphs = []
-    current_paragraph = []
+    # The lines come out ordered by page, y group and x, which is already page and
+    # vertical order (to within the line tolerance), so they are merged without re-sorting
+    if __debug__:
+        page_steps = np.diff(line_pages)
+        group_steps = np.diff((line_bboxes[:, 1] / vertical_tolerance).astype(np.int64))
+        assert np.all((page_steps > 0) | ((page_steps == 0) & (group_steps >= 0))), "lines out of order"
     
-    # Sort lines by page and vertical position
-    sorted_lines = sorted(lines, key=lambda x: (x['page'], x['bbox'][1]))
+    paragraph_ids, paragraph_bboxes = merge_paragraphs(line_pages, line_bboxes, vertical_gap_threshold)
     
-    for line in sorted_lines:
-        if not current_paragraph:
-            current_paragraph.append(line)
-        else:
-            last_line = current_paragraph[-1]
-            # Calculate vertical gap between last line's bottom and current line's top
-            gap = line['bbox'][1] - last_line['bbox'][3]
-            
-            if (line['page'] == last_line['page'] and 
-                gap <= vertical_gap_threshold):
-                current_paragraph.append(line)
-            else:
-                paragraphs.append(current_paragraph)
-                current_paragraph = [line]
-    
-    if current_paragraph:
-        paragraphs.append(current_paragraph)
+    # Every paragraph is a contiguous run of the sorted blocks, so its text is a single slice
+    block_paragraphs = paragraph_ids[line_ids]
+    bounds = np.flatnonzero(np.diff(block_paragraphs, append=-1)) + 1
+    sorted_texts = [texts[index] for index in order.tolist()]
+    paragraph_pages = line_pages[np.flatnonzero(np.diff(paragraph_ids, prepend=-1))]
     
+    start = 0
+    for end, bbox, page in zip(bounds.tolist(), paragraph_bboxes.tolist(), paragraph_pages.tolist()):
+        yield ' '.join(sorted_texts[start:end]), bbox, page
+        start = end
+
+def get_tesseract_api():
+    """Return this thread's Tesseract instance, loading the English model on first use."""
+    api = getattr(tesseract_local, 'api', None)
+    if api is None:
+        api = PyTessBaseAPI(lang='eng', psm=PSM.AUTO, oem=OEM.LSTM_ONLY)
+        tesseract_local.api = api
+    return api
+
+def run_batch_ocr(ocr_pages):
+    """OCR a batch of page images and convert the words back to PDF coordinates.
+
+    Returns the words as parallel arrays: their texts, an (N, 4) array of bboxes and
+    an array of page numbers.
+    """
+    api = get_tesseract_api()
+
+    texts = []
+    image_index = []
+    image_boxes = []  # (left, top, right, bottom) in image coordinates
+    for index, (_, image, _, _, _, _) in enumerate(ocr_pages):
+        # Spilled by the extraction, Tesseract has read it once SetImageFile returns
+        api.SetImageFile(image)
+        os.remove(image)
+        api.Recognize()
+        result = api.GetIterator()
+        if result is None:
+            continue
+
+        for word in iterate_level(result, RIL.WORD):
+            text = word.GetUTF8Text(RIL.WORD)
+            # Keep only the results that hold an actual word
+            if text.strip():
+                texts.append(text)
+                image_index.append(index)
+                image_boxes.append(word.BoundingBox(RIL.WORD))
+
+    if not texts:
+        return [], np.empty((0, 4)), np.empty(0, dtype=np.int64)
+
+    image_index = np.asarray(image_index)
+    image_boxes = np.asarray(image_boxes, dtype=np.float64)
+    # Skip the image column, which would copy every raster into a fixed-width bytes array
+    page_nums, page_widths, page_heights, pix_widths, pix_heights = (
+        np.array([ocr_page[column] for ocr_page in ocr_pages]) for column in (0, 2, 3, 4, 5)
+    )
+
+    # Scale factors from image to page space, one division per page rather than per word
+    scale_x = page_widths / pix_widths
+    scale_y = page_heights / pix_heights
+
+    # Convert image coords to PDF coords for every word in one go
+    bboxes = convert_image_to_pdf_coords(
+        image_boxes[:, 0],
+        image_boxes[:, 1],
+        image_boxes[:, 2] - image_boxes[:, 0],
+        image_boxes[:, 3] - image_boxes[:, 1],
+        scale_x[image_index],
+        scale_y[image_index]
+    )
+
+    return texts, bboxes, page_nums[image_index]
+
+def to_ndjson_line(paragraph):
+    """Serialize a paragraph as one line of newline-delimited JSON."""
+    return orjson.dumps(paragraph.model_dump()) + b"\n"
+
+def stream_lines(lines):
+    """Send already serialized NDJSON lines, one at a time."""
+    async def ndjson_lines():
+        for line in lines:
+            yield line
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+async def run_in_page_worker(func, *args):
+    """Run func in a page worker process.
+
+    A worker dying (e.g. MuPDF crashing on a malformed PDF) breaks the whole pool, so
+    it is replaced before the error is raised and later requests still get workers.
+    """
+    global page_executor
+    executor = page_executor
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+    except BrokenProcessPool:
+        # Concurrent requests on the same pool all see the error, only replace it once
+        if page_executor is executor:
+            page_executor = new_page_executor()
+            executor.shutdown(wait=False)
+        raise
+
+async def extract_chunk(pdf_source, page_nums, spill_dir):
+    """Extract a run of pages and OCR its scanned pages, returning the run's
+    (text, bbox, page) paragraphs in page order."""
+    paragraphs, ocr_pages = await run_in_page_worker(extract_pages, pdf_source, page_nums, spill_dir)
+
+    if ocr_pages:
+        # Split the scanned pages into one batch per worker and OCR the batches in parallel
+        loop = asyncio.get_running_loop()
+        batch_count = min(OCR_WORKERS, len(ocr_pages))
+        ocr_batches = await asyncio.gather(*(
+            loop.run_in_executor(ocr_executor, run_batch_ocr, ocr_pages[i::batch_count])
+            for i in range(batch_count)
+        ))
+        batch_texts, batch_bboxes, batch_pages = zip(*ocr_batches)
+
+        # OCR output is a flat list of words, so group them into lines and paragraphs with adaptive thresholds
+        paragraphs.extend(group_text_blocks(
+            list(itertools.chain.from_iterable(batch_texts)),
+            np.concatenate(batch_bboxes),
+            np.concatenate(batch_pages)
+        ))
+
+        # Put the OCR paragraphs back in page order (the sort is stable)
+        paragraphs.sort(key=lambda paragraph: paragraph[2])
+
     return paragraphs
 
-def create_paragraph_bbox(lines: List[Dict[str, Any]]):
-    """Create a bounding box that encompasses all lines in the paragraph."""
-    left = min(line['bbox'][0] for line in lines)
-    top = min(line['bbox'][1] for line in lines)
-    right = max(line['bbox'][2] for line in lines)
-    bottom = max(line['bbox'][3] for line in lines)
-    return [left, top, right, bottom]
+async def extract_chunks(pdf_source, page_count, spill_dir):
+    """Yield the paragraphs of one contiguous run of pages per worker, in page order.
+
+    All runs start at once and each opens the document a single time. A run's paragraphs
+    are yielded as soon as it and the runs before it are done.
+    """
+    chunk_size = max(1, -(-page_count // PAGE_WORKERS))
+    pending = collections.deque(
+        asyncio.ensure_future(extract_chunk(
+            pdf_source,
+            range(start, min(start + chunk_size, page_count)),
+            spill_dir
+        ))
+        for start in range(0, page_count, chunk_size)
+    )
+
+    try:
+        while pending:
+            yield await pending.popleft()
+    finally:
+        # The client went away or a run failed, drop the work that is still queued
+        for task in pending:
+            task.cancel()
+
+async def download_to_temp_file(response):
+    """Stream a response body into a temp file so it is never held in memory, returning the file's path."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_pdf:
+        try:
+            async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                temp_pdf.write(chunk)
+        except BaseException:
+            temp_pdf.close()
+            os.remove(temp_pdf.name)
+            raise
+    return temp_pdf.name
 
 @app.post("/extract")
 async def extract_text(request: PDFRequest):
+    cache_key = hashlib.sha256(request.pdf_url.encode()).hexdigest()
+    cached = pdf_cache.get(cache_key)
+    
+    # Ask the origin whether the cached PDF is still current
+    conditional_headers = {}
+    if cached is not None:
+        if cached['etag']:
+            conditional_headers['If-None-Match'] = cached['etag']
+        if cached['last_modified']:
+            conditional_headers['If-Modified-Since'] = cached['last_modified']
+        if not conditional_headers:
+            # Nothing to revalidate against, serve the cached result until it expires
+            return stream_lines(cached['lines'])
+
+    not_modified = False
+    pdf_bytes = None
+    temp_pdf_path = None
     try:
-        # Download PDF
-        response = requests.get(request.pdf_url)
-        response.raise_for_status()
+        async with httpx.AsyncClient(follow_redirects=True) as client:
+            async with client.stream("GET", request.pdf_url, headers=conditional_headers) as response:
+                if response.status_code == 304 and cached is not None:
+                    not_modified = True
+                else:
+                    response.raise_for_status()
+                    etag = response.headers.get('ETag')
+                    last_modified = response.headers.get('Last-Modified')
+                    content_length = int(response.headers.get('Content-Length', 0))
+                    if 0 < content_length <= IN_MEMORY_PDF_LIMIT:
+                        pdf_bytes = await response.aread()
+                    else:
+                        temp_pdf_path = await download_to_temp_file(response)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to download PDF: {str(e)}")
 
-    # Create temp file
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_pdf:
-        temp_pdf.write(response.content)
-        temp_pdf_path = temp_pdf.name
+    if not_modified:
+        return stream_lines(cached['lines'])
+
+    # One random ID per request, numbered per paragraph, avoids a urandom read for every ID
+    request_id = uuid4().hex
+    paragraph_ids = itertools.count()
+
+    # Small documents go to the workers as bytes, pickled once per run of pages
+    pdf_source = pdf_bytes if pdf_bytes is not None else temp_pdf_path
+
+    # Scanned pages are spilled to disk for OCR rather than held in memory until their run is done
+    spill_dir = tempfile.mkdtemp()
 
-    extracted_data = []
-    
     try:
-        doc = fitz.open(temp_pdf_path)
-        
-        for page_num in range(len(doc)):
-            page = doc.load_page(page_num)
-            page_width = page.rect.width
-            page_height = page.rect.height
-
-            # Try text extraction first
-            text_blocks = page.get_text("words")
-            
-            if text_blocks:
-                for block in text_blocks:
-                    # Convert tuple to dictionary for grouping
-                    extracted_data.append({
-                        'id': str(uuid4()),  # Unique ID
-                        'text': block[4],  # Text content
-                        'bbox': list(block[:4]),  # Bounding box (convert tuple to list)
-                        'page': page_num
-                    })
-            else:
-                # Fallback to OCR
-                pix = page.get_pixmap()
-                img = Image.open(io.BytesIO(pix.tobytes()))
-                
-                # Perform OCR
-                ocr_data = pytesseract.image_to_data(img, output_type=pytesseract.Output.DICT)
-                
-                for i in range(len(ocr_data['text'])):
-                    text = ocr_data['text'][i]
-                    if text.strip():
-                        # Convert image coords to PDF coords
-                        x = ocr_data['left'][i]
-                        y = ocr_data['top'][i]
-                        w = ocr_data['width'][i]
-                        h = ocr_data['height'][i]
-                        
-                        bbox = convert_image_to_pdf_coords(
-                            x, y, w, h,
-                            page_width, page_height
-                        )
-                        
-                        extracted_data.append({
-                            'id': str(uuid4()),
-                            'text': text,
-                            'bbox': bbox,
-                            'page': page_num
-                        })
-        
-        # Group text blocks into lines with adaptive thresholds
-        line_grouped_blocks = group_text_blocks(extracted_data)
-        
-        # Group lines into paragraphs with adaptive thresholds
-        paragraph_blocks = group_paragraphs(line_grouped_blocks)
-        
-        # Format paragraphs
-        formatted_data = []
-        for paragraph in paragraph_blocks:
-            if paragraph:
-                text = ' '.join(line['text'] for line in paragraph)
-                bbox = create_paragraph_bbox(paragraph)
-                formatted_data.append(ExtractionResult(
-                    id=str(uuid4()),  # Generate a new ID for the paragraph
-                    text=text,
-                    bbox=bbox,
-                    page=paragraph[0]['page']
-                ))
-        
-        doc.close()
+        page_count = await run_in_page_worker(count_pages, pdf_source)
     except Exception as e:
+        if temp_pdf_path is not None:
+            os.remove(temp_pdf_path)
+        shutil.rmtree(spill_dir, ignore_errors=True)
         raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
-    finally:
-        os.remove(temp_pdf_path)
 
-    return formatted_data
\ No newline at end of file
+    async def ndjson_lines():
+        # The lines are also kept for the cache, unless they outgrow CACHE_MAX_RESULT_BYTES
+        lines = []
+        size = 0
+        chunks = extract_chunks(pdf_source, page_count, spill_dir)
+        try:
+            async for paragraphs in chunks:
+                # Results are built from our own extraction output, so pydantic validation is skipped
+                for text, bbox, page in paragraphs:
+                    line = to_ndjson_line(ExtractionResult.model_construct(
+                        id=f"{request_id}-p{next(paragraph_ids)}",  # Unique ID
+                        text=text,
+                        bbox=bbox,
+                        page=page
+                    ))
+                    size += len(line)
+                    if size <= CACHE_MAX_RESULT_BYTES:
+                        lines.append(line)
+                    else:
+                        lines.clear()
+                    yield line
+        except Exception as e:
+            # The 200 status has already gone out, so the error is sent as the last line instead
+            yield orjson.dumps({'error': f"Processing error: {str(e)}"}) + b"\n"
+            return
+        finally:
+            await chunks.aclose()
+            if temp_pdf_path is not None:
+                os.remove(temp_pdf_path)
+            shutil.rmtree(spill_dir, ignore_errors=True)
+
+        # Only a complete result gets this far
+        if size <= CACHE_MAX_RESULT_BYTES:
+            pdf_cache[cache_key] = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'lines': lines,
+                'size': size
+            }
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
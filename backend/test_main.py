@@ -0,0 +1,61 @@
+import numpy as np
+
+from main import group_text_blocks, merge_lines
+
+
+def words(*boxes):
+    """Build the parallel (texts, bboxes, pages) arrays from (text, x0, y0, x1, y1, page) tuples."""
+    texts = [box[0] for box in boxes]
+    bboxes = np.array([box[1:5] for box in boxes], dtype=np.float64)
+    pages = np.array([box[5] for box in boxes], dtype=np.int64)
+    return texts, bboxes, pages
+
+
+def test_no_words():
+    assert list(group_text_blocks([], np.empty((0, 4)), np.empty(0, dtype=np.int64))) == []
+
+
+def test_words_on_a_line_join_left_to_right():
+    paragraphs = list(group_text_blocks(*words(
+        ('world', 40, 1, 70, 11, 0),
+        ('Hello', 0, 0, 30, 10, 0),
+        ('again', 75, 0, 100, 10, 0),
+    )))
+    assert paragraphs == [('Hello world again', [0, 0, 100, 11], 0)]
+
+
+def test_merge_lines_splits_on_horizontal_gap():
+    bboxes = np.array([
+        [0, 0, 30, 10],
+        [32, 0, 60, 10],  # 2 apart, within the tolerance
+        [110, 0, 140, 10],  # 50 apart, starts a new line
+    ], dtype=np.float64)
+    line_starts = np.array([True, False, False])
+    line_ids, line_bboxes = merge_lines(line_starts, bboxes, 3.0)
+    assert line_ids.tolist() == [0, 0, 1]
+    assert line_bboxes.tolist() == [[0, 0, 60, 10], [110, 0, 140, 10]]
+
+
+def test_vertical_gap_splits_paragraphs():
+    paragraphs = list(group_text_blocks(*words(
+        ('first', 0, 0, 30, 10, 0),
+        ('line', 0, 12, 30, 22, 0),  # 2 below the first line
+        ('second', 0, 60, 30, 70, 0),  # 38 below, past 1.5 line heights
+        ('paragraph', 35, 60, 80, 70, 0),
+    )))
+    assert paragraphs == [
+        ('first line', [0, 0, 30, 22], 0),
+        ('second paragraph', [0, 60, 80, 70], 0),
+    ]
+
+
+def test_page_boundary_splits_paragraphs():
+    paragraphs = list(group_text_blocks(*words(
+        ('next', 0, 0, 30, 10, 1),
+        ('page', 0, 500, 30, 510, 0),
+        ('one', 0, 512, 30, 522, 0),
+    )))
+    assert paragraphs == [
+        ('page one', [0, 500, 30, 522], 0),
+        ('next', [0, 0, 30, 10], 1),
+    ]
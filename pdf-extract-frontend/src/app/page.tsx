@@ -33,9 +33,33 @@ export default function Home() {
         throw new Error(error.detail || 'Failed to process PDF');
       }
 
-      const data = await response.json();
-      setExtractedData(data);
+      // The backend streams one JSON paragraph per line, show them as they arrive
+      setExtractedData([]);
+      const reader = response.body!.getReader();
+      const decoder = new TextDecoder();
+      let buffered = '';
+
+      while (true) {
+        const { done, value } = await reader.read();
+        buffered += decoder.decode(value, { stream: !done });
+
+        const lines = buffered.split('\n');
+        buffered = done ? '' : lines.pop() ?? '';
+        const paragraphs = lines.filter((line) => line.trim()).map((line) => JSON.parse(line));
+        // A failure after streaming started arrives as a final error line
+        const failure = paragraphs.find((paragraph) => paragraph.error);
+        if (failure) {
+          throw new Error(failure.error);
+        }
+        if (paragraphs.length) {
+          setExtractedData((previous) => [...previous, ...paragraphs]);
+        }
+
+        if (done) break;
+      }
     } catch (err) {
+      // Don't leave a partial transcript next to the error
+      setExtractedData([]);
       setError(err instanceof Error ? err.message : 'Unknown error occurred');
     } finally {
       setIsLoading(false);